@@ -1,12 +1,17 @@
-from abc import ABC, abstractmethod
+import sys
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
 from enum import Enum, auto
-from typing import List
+from typing import Deque, Dict, List, Tuple
 
 class ElevatorState(Enum):
   UP = auto()
   DOWN = auto()
   IDLE = auto()
 
+# Module-level aliases for the states used on the scheduling hot path
+IDLE, UP, DOWN = ElevatorState.IDLE, ElevatorState.UP, ElevatorState.DOWN
+
 
 # Associate zone with each floor
 # Top bottom middle zoning: Top 25%, Middle 50% and Bottom 25%
@@ -49,9 +54,18 @@ class ButtonPanel:
 
 
 class Floor:
+  __slots__ = ("number", "_button_panel")
+
   def __init__(self, number: int):
     self.number = number
-    self.button_panel = ButtonPanel(number)
+    self._button_panel = None
+
+  # Most floor panels are never pressed, so build them on first use
+  @property
+  def button_panel(self):
+    if self._button_panel is None:
+      self._button_panel = ButtonPanel(self.number)
+    return self._button_panel
   
   def callElevator(self, direction: ElevatorState):
     print(f"Elevator called at floor {self.number} to go {direction.name}")
@@ -60,23 +74,35 @@ class Floor:
 
 # Elevator car: controls the door and movement
 class ElevatorCar:
+  __slots__ = ("id", "current_floor", "max_load", "max_speed", "capacity", "state", "door", "zone", "requests", "dispatcher")
+
   def __init__(self, id: int, max_load: int, max_speed: float, capacity: int, zone: str):
     self.id = id
     self.current_floor = 0
     self.max_load = max_load
     self.max_speed = max_speed
     self.capacity = capacity
-    self.state = ElevatorState.IDLE
+    self.state = IDLE
     self.door = Door()
-    self.zone = zone
+    self.zone = sys.intern(zone)
     self.requests = []
+    self.dispatcher = None
+
+  # Every state transition goes through here so the dispatcher's index stays in sync
+  # and parked requests get a chance once the car becomes idle
+  def setState(self, state: ElevatorState):
+    self.state = state
+    if self.dispatcher:
+      self.dispatcher.onElevatorUpdate(self)
+      if state == IDLE:
+        self.dispatcher.notifyElevatorIdle(self)
   
   def moveTo(self, floor: int):
     print(f"Elevator {self.id} moving from floor {self.current_floor} to {floor}")
-    self.state = ElevatorState.UP if floor > self.current_floor else ElevatorState.DOWN
+    self.setState(UP if floor > self.current_floor else DOWN)
     self.current_floor = floor
-    self.state = ElevatorState.IDLE
     self.openDoor()
+    self.setState(IDLE)
   
   def openDoor(self):
     self.door.open()
@@ -86,92 +112,199 @@ class ElevatorCar:
   
   def emergencyStop(self):
     print(f"Elevator {self.id} emergency stop!")
-    self.state = ElevatorState.IDLE
-  
-  def zoneMatches(self, floor: int, total_floors: int = 200, strategy: str = "TOP_MIDDLE_BOTTOM"):
-    request_zone = getZoneForFloor(floor, total_floors, strategy)
-    return self.zone == request_zone
+    self.setState(IDLE)
 
 
 # Request and scheduling using strategy pattern
 class Request:
+  __slots__ = ("floor", "direction")
+
   def __init__(self, floor: int, direction: ElevatorState):
     self.floor = floor
     self.direction = direction
 
-class SchedulingAlgorithm(ABC):
-  @abstractmethod
-  def schedule(self, request: Request, elevators: List[ElevatorCar]):
-    pass
 
-# FCFS: Choose first ide elevator
-class FCFSAlgorithm(SchedulingAlgorithm):
-  def schedule(self, request: Request, elevators: List[ElevatorCar]):
+# Elevator index: keeps elevators bucketed per zone and state so that
+# schedulers don't have to scan every elevator on each request
+class ElevatorIndex:
+  def __init__(self, elevators: List[ElevatorCar], floor_zone: List[str]):
+    self.floor_zone = floor_zone
+    self.elevators_by_id: Dict[int, ElevatorCar] = {}
+    # Idle elevators per zone, in the order they became idle (FCFS)
+    self.idle_by_zone: Dict[str, Dict[int, ElevatorCar]] = defaultdict(dict)
+    # Sorted (current_floor, id) pairs per (zone, state), for nearest-floor queries (SSTF, SCAN)
+    self.floors_by_zone_state: Dict[Tuple[str, ElevatorState], List[Tuple[int, int]]] = defaultdict(list)
+    # Last indexed (state, floor) of each elevator, needed to remove stale entries
+    self.indexed: Dict[int, Tuple[ElevatorState, int]] = {}
     for elevator in elevators:
-      if elevator.state == ElevatorState.IDLE and elevator.zoneMatches(request.floor):
-        return elevator
-    return None
+      self.add(elevator)
+
+  def add(self, elevator: ElevatorCar):
+    self.elevators_by_id[elevator.id] = elevator
+    self.indexed[elevator.id] = (elevator.state, elevator.current_floor)
+    if elevator.state == IDLE:
+      self.idle_by_zone[elevator.zone][elevator.id] = elevator
+    insort(self.floors_by_zone_state[(elevator.zone, elevator.state)], (elevator.current_floor, elevator.id))
+
+  def remove(self, elevator: ElevatorCar):
+    state, floor = self.indexed.pop(elevator.id)
+    if state == IDLE:
+      del self.idle_by_zone[elevator.zone][elevator.id]
+    floors = self.floors_by_zone_state[(elevator.zone, state)]
+    del floors[bisect_left(floors, (floor, elevator.id))]
+
+  def update(self, elevator: ElevatorCar):
+    self.remove(elevator)
+    self.add(elevator)
+
+  def firstIdle(self, zone: str):
+    return next(iter(self.idle_by_zone[zone].values()), None)
+
+  # Lowest-id entry at the same floor as floors[i], so ties go to the lowest id
+  @staticmethod
+  def firstAtFloor(floors: List[Tuple[int, int]], i: int):
+    return floors[bisect_left(floors, (floors[i][0], -1))]
+
+  def nearestIdle(self, zone: str, floor: int):
+    floors = self.floors_by_zone_state[(zone, IDLE)]
+    i = bisect_left(floors, (floor, -1))
+    # Closest idle elevator is either the first one at/above the floor or the first one on the nearest floor below it
+    candidates = []
+    if i < len(floors):
+      candidates.append(floors[i])
+    if i > 0:
+      candidates.append(self.firstAtFloor(floors, i - 1))
+    if not candidates:
+      return None
+    _, elevator_id = min(candidates, key = lambda c: (abs(c[0] - floor), c[1]))
+    return self.elevators_by_id[elevator_id]
+
+  # Closest elevator already moving in `direction` that has not passed `floor` yet
+  def nearestApproaching(self, zone: str, direction: ElevatorState, floor: int):
+    floors = self.floors_by_zone_state[(zone, direction)]
+    if direction == UP:
+      i = bisect_right(floors, (floor, float("inf")))
+      candidate = self.firstAtFloor(floors, i - 1) if i > 0 else None
+    elif direction == DOWN:
+      i = bisect_left(floors, (floor, -1))
+      candidate = floors[i] if i < len(floors) else None
+    else:
+      candidate = None
+    return self.elevators_by_id[candidate[1]] if candidate else None
+
+
+class SchedulingAlgorithm:
+  def schedule(self, request: Request, index: ElevatorIndex):
+    raise NotImplementedError
+
+# FCFS: Choose first idle elevator
+class FCFSAlgorithm(SchedulingAlgorithm):
+  def schedule(self, request: Request, index: ElevatorIndex):
+    return index.firstIdle(index.floor_zone[request.floor])
 
 # SSTF: Shortest seek time first
 # Selects idle elevator with minimum distance to the request floor
 class SSTFAlgorithm(SchedulingAlgorithm):
-  def schedule(self, request: Request, elevators: List[ElevatorCar]):
-    eligible_elevators = [e for e in elevators if e.state == ElevatorState.IDLE and e.zoneMatches(request.floor)]
-    if not eligible_elevators:
-      return None
-    return min(eligible_elevators, key = lambda e: abs(e.current_floor - request.floor))
+  def schedule(self, request: Request, index: ElevatorIndex):
+    return index.nearestIdle(index.floor_zone[request.floor], request.floor)
 
 # Elevator moves in one direction fulfilling all requests
 # Then reverses the direction when no further requests exist
 class SCANAlgorithm(SchedulingAlgorithm):
-  def schedule(self, request: Request, elevators: List[ElevatorCar]):
-    eligible_elevators = []
-    for elevator in elevators:
-      if elevator.zoneMatches(request.floor):
-        if (elevator.state == ElevatorState.IDLE or (elevator.state == request.direction and (
-          (request.direction == ElevatorState.UP and elevator.current_floor <= request.floor) or 
-          (request.direction == ElevatorState.DOWN and elevator.current_floor >= request.floor)
-        ))):
-          eligible_elevators.append(elevator)
+  def schedule(self, request: Request, index: ElevatorIndex):
+    zone = index.floor_zone[request.floor]
+    eligible_elevators = [
+      elevator for elevator in (
+        index.nearestIdle(zone, request.floor),
+        index.nearestApproaching(zone, request.direction, request.floor),
+      ) if elevator
+    ]
     if not eligible_elevators:
       return None
-    return min(eligible_elevators, key = lambda e: abs(e.current_floor - request.floor))
+    return min(eligible_elevators, key = lambda e: (abs(e.current_floor - request.floor), e.id))
   
 
 # Dispatcher: coordinates between floor requests and available elevators
 class Dispatcher:
-  def __init__(self, elevators: List[ElevatorCar], scheduling_algorithm: SchedulingAlgorithm):
+  def __init__(self, elevators: List[ElevatorCar], scheduling_algorithm: SchedulingAlgorithm, floor_zone: List[str]):
     self.elevators = elevators
     self.scheduling_algorithm = scheduling_algorithm
-    self.request_queue: List[Request] = []
+    self.request_queue: Deque[Request] = deque()
+    # Requests no elevator could take, parked per zone until an elevator there becomes idle
+    self.pending_by_zone: Dict[str, Deque[Request]] = defaultdict(deque)
+    # Zones whose parked requests should be retried because an elevator there went idle
+    self.ready_zones: Deque[str] = deque()
+    # Set while the outermost dispatch() is running; nested calls leave the work to it
+    self.dispatching = False
+    self.index = ElevatorIndex(elevators, floor_zone)
+    for elevator in elevators:
+      elevator.dispatcher = self
   
   def addRequest(self, request: Request):
     print(f"Dispatcher received request at floor {request.floor} going to {request.direction.name}")
     self.request_queue.append(request)
     self.dispatch()
+
+  def assign(self, elevator: ElevatorCar, request: Request):
+    print(f"Dispatching elevator {elevator.id} to floor {request.floor}")
+    elevator.moveTo(request.floor)
   
+  # Assigning an elevator can make it idle again, which calls back into the dispatcher.
+  # Only the outermost call does the work, looping instead of recursing.
   def dispatch(self):
-    while self.request_queue:
-      request = self.request_queue.pop(0)
-      elevator: ElevatorCar = self.scheduling_algorithm.schedule(request, self.elevators)
-      if elevator:
-        print(f"Dispatching elevator {elevator.id} to floor {request.floor}")
-        elevator.moveTo(request.floor)
-      else:
-        print("No available elevator, re-queueing request")
-        self.request_queue.append(request)
-        break
+    if self.dispatching:
+      return
+    self.dispatching = True
+    try:
+      while self.ready_zones or self.request_queue:
+        # Parked requests waited longer, so serve them before new ones
+        if self.ready_zones:
+          self.drainZone(self.ready_zones.popleft())
+          continue
+        request = self.request_queue.popleft()
+        elevator: ElevatorCar = self.scheduling_algorithm.schedule(request, self.index)
+        if elevator:
+          self.assign(elevator, request)
+        else:
+          self.park(request)
+    finally:
+      self.dispatching = False
+
+  # Serve parked requests of a zone until the scheduler runs out of elevators
+  def drainZone(self, zone: str):
+    pending = self.pending_by_zone[zone]
+    while pending:
+      elevator: ElevatorCar = self.scheduling_algorithm.schedule(pending[0], self.index)
+      if not elevator:
+        return
+      self.assign(elevator, pending.popleft())
+
+  def park(self, request: Request):
+    print("No available elevator, parking request until one frees up")
+    self.pending_by_zone[self.index.floor_zone[request.floor]].append(request)
+
+  # Called when an elevator goes idle: mark its zone ready so parked requests are retried
+  def notifyElevatorIdle(self, elevator: ElevatorCar):
+    if not self.pending_by_zone.get(elevator.zone) or elevator.zone in self.ready_zones:
+      return
+    self.ready_zones.append(elevator.zone)
+    self.dispatch()
+
+  def onElevatorUpdate(self, elevator: ElevatorCar):
+    self.index.update(elevator)
 
 
 # Elevator system class
 class ElevatorSystem:
   def __init__(self, total_floors: int = 200, num_elevators: int = 50, scheduling_algorithm: SchedulingAlgorithm = None):
     self.total_floors = total_floors
-    self.floors = [Floor(i) for i in range(1, total_floors + 1)]
+    self.floors: Tuple[Floor, ...] = tuple(Floor(i) for i in range(1, total_floors + 1))
+    # Zone of every floor, computed once instead of on each scheduling check
+    self.floor_zone: List[str] = [sys.intern(getZoneForFloor(floor, total_floors)) for floor in range(total_floors + 2)]
     self.elevators: List[ElevatorCar] = self.createElevators(num_elevators)
     if scheduling_algorithm is None:
       scheduling_algorithm = FCFSAlgorithm()
-    self.dispatcher = Dispatcher(self.elevators, scheduling_algorithm)
+    self.dispatcher = Dispatcher(self.elevators, scheduling_algorithm, self.floor_zone)
   
   def createElevators(self, num_elevators: int):
     elevators = []
@@ -188,13 +321,15 @@ class ElevatorSystem:
     return elevators
 
   def callElevator(self, floor: int, direction: ElevatorState):
+    if not 1 <= floor <= self.total_floors:
+      raise Exception(f"Invalid floor {floor}")
     request = Request(floor, direction)
     self.dispatcher.addRequest(request)
   
   def emergencyAlarm(self, elevator_id: int):
-    for elevator in self.elevators:
-      if elevator.id == elevator_id:
-        elevator.emergencyStop()
+    elevator = self.dispatcher.index.elevators_by_id.get(elevator_id)
+    if elevator:
+      elevator.emergencyStop()
   
   def monitorSystem(self):
     print("System monitoring")
@@ -1,6 +1,6 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
-from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 
 # FileType Enum for type of files
@@ -12,6 +12,8 @@ class FileType(Enum):
 
 # File class with necessary details
 class File:
+  __slots__ = ("name", "size", "type", "is_directory", "children")
+
   def __init__(self, name, size, type, is_directory = False, children = None):
     self.name = name
     self.size = size
@@ -23,68 +25,182 @@ class File:
     return f"<Name: {self.name}, size: {self.size}, type: {self.type.name}>"
   
 
+# Binds a value into the namespace of a generated predicate and returns its name
+def bindValue(env: dict, value):
+  name = f"_v{len(env)}"
+  env[name] = value
+  return name
+
+
 # Filter interface
-class Filter(ABC):
-  @abstractmethod
-  def apply(self):
-    pass
+# cost is a rough relative price of apply(); combination filters use it to run cheap checks first
+class Filter:
+  __slots__ = ("_compiled",)
+  cost = 10
+
+  def apply(self, file: File):
+    raise NotImplementedError
+
+  # Predicate compiled from this filter tree, built on first use and reused afterwards
+  def compile(self):
+    try:
+      return self._compiled
+    except AttributeError:
+      self._compiled = compileFilter(self)
+      return self._compiled
+
+  # Python expression equivalent to apply() on `var`, used by compileFilter
+  # Filters without a specialised expression fall back to calling apply()
+  def asExpr(self, var: str, env: dict):
+    return f"{bindValue(env, self.apply)}({var})"
 
 # Individual filters, which implement above interface
 class MinSizeFilter(Filter):
+  __slots__ = ("min_size",)
+  cost = 1
+
   def __init__(self, min_size):
     self.min_size = min_size
   
   def apply(self, file: File):
     return file.size >= self.min_size
+
+  def asExpr(self, var: str, env: dict):
+    return f"{var}.size >= {bindValue(env, self.min_size)}"
   
 
 class FileTypeFilter(Filter):
+  __slots__ = ("file_type",)
+  cost = 2
+
   def __init__(self, file_type):
     self.file_type = file_type
   
   def apply(self, file: File):
     return file.type == self.file_type
 
+  def asExpr(self, var: str, env: dict):
+    return f"{var}.type == {bindValue(env, self.file_type)}"
+
 # Combination filters
+# Both sort their filters cheapest first, so short-circuiting skips the expensive ones
 class AndFilter(Filter):
+  __slots__ = ("filters", "applies")
+
   def __init__(self, filters: List[Filter]):
-    self.filters = filters
+    self.filters = sorted(filters, key = lambda f: f.cost)
+    self.applies = tuple(filter.apply for filter in self.filters)
+
+  @property
+  def cost(self):
+    return sum(filter.cost for filter in self.filters)
   
   def apply(self, file: File):
-    return all(filter.apply(file) for filter in self.filters)
+    for apply in self.applies:
+      if not apply(file):
+        return False
+    return True
+
+  def asExpr(self, var: str, env: dict):
+    if not self.filters:
+      return "True"
+    return "(" + " and ".join(filter.asExpr(var, env) for filter in self.filters) + ")"
 
 class OrFilter(Filter):
+  __slots__ = ("filters", "applies")
+
   def __init__(self, filters: List[Filter]):
-    self.filters = filters
+    self.filters = sorted(filters, key = lambda f: f.cost)
+    self.applies = tuple(filter.apply for filter in self.filters)
+
+  @property
+  def cost(self):
+    return sum(filter.cost for filter in self.filters)
   
   def apply(self, file: File):
-    return any(filter.apply(file) for filter in self.filters)
+    for apply in self.applies:
+      if apply(file):
+        return True
+    return False
+
+  def asExpr(self, var: str, env: dict):
+    if not self.filters:
+      return "False"
+    return "(" + " or ".join(filter.asExpr(var, env) for filter in self.filters) + ")"
 
 class NotFilter(Filter):
+  __slots__ = ("filter",)
+
   def __init__(self, filter: Filter):
     self.filter = filter
+
+  @property
+  def cost(self):
+    return self.filter.cost
   
   def apply(self, file: File):
     return not self.filter.apply(file)
 
+  def asExpr(self, var: str, env: dict):
+    return f"(not {self.filter.asExpr(var, env)})"
+
+
+# Compiles a filter tree into a single generated function, so matching a
+# file is one call instead of one apply() per filter in the tree.
+# Trees nested too deeply for the parser fall back to the apply() chain.
+def compileFilter(root_filter: Filter):
+  env = {}
+  try:
+    expr = root_filter.asExpr("file", env)
+    return eval(f"lambda file: {expr}", env)
+  except (SyntaxError, RecursionError):
+    return root_filter.apply
+
 class NotADirectory(Exception):
   pass
 
+# Directories with fewer subdirectories than this are searched on the calling thread
+PARALLEL_MIN_SUBDIRECTORIES = 16
+
 class FindCommand:
+  # Parallel search is opt-in: pass an executor to have large directories'
+  # subtrees searched on it. The same executor is reused across calls.
+  def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+    self.executor = executor
+
   def findWithFilters(self, directory: File, root_filter: Filter):
     if not directory.is_directory:
       raise NotADirectory(f"{directory.name} is not a directory")
+    predicate = root_filter.compile()
+    children = list(directory.children.values())
+    subdirectories = sum(1 for child in children if child.is_directory)
+    if self.executor is None or subdirectories < PARALLEL_MIN_SUBDIRECTORIES:
+      return self.collect(directory, predicate)
+
+    # Search each top-level subdirectory on the executor, then merge the
+    # results back in child order
+    parts = [self.executor.submit(self.collect, child, predicate) if child.is_directory else child for child in children]
     search_results = []
-    self.recurse(directory, root_filter, search_results)
+    for part in parts:
+      if isinstance(part, Future):
+        search_results.extend(part.result())
+      elif predicate(part):
+        search_results.append(part)
     return search_results
 
-  def recurse(self, directory: File, root_filter: Filter, search_results):
-    for child in directory.children.values():
-      if child.is_directory:
-        self.recurse(child, root_filter, search_results)
-      else:
-        if root_filter.apply(child):
-          search_results.append(child)
+  # Iterative depth-first traversal with an explicit stack, so deep trees
+  # can't hit the recursion limit. Children are pushed in reverse to keep
+  # the same result order as a recursive walk.
+  def collect(self, directory: File, predicate):
+    search_results = []
+    stack = [directory]
+    while stack:
+      node = stack.pop()
+      if node.is_directory:
+        stack.extend(reversed(node.children.values()))
+      elif predicate(node):
+        search_results.append(node)
+    return search_results
 
 
 if __name__ == "__main__":
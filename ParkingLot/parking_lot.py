@@ -1,7 +1,7 @@
-from datetime import datetime
+import math
+import time
 from enum import Enum
-from abc import ABC
-from typing import List
+from typing import Dict, List
 
 class VehicleType(Enum):
   MOTORBIKE = "MOTORBIKE"
@@ -14,10 +14,13 @@ class Vehicle:
   def __init__(self, license_plate: str, vehicle_type: VehicleType):
     self.license_plate = license_plate
     self.vehicle_type = vehicle_type
+    self.active_ticket = None
 
 
 # Parking Spot
 class ParkingSpot:
+  __slots__ = ("spot_id", "spot_type", "occupied")
+
   def __init__(self, spot_id: int, spot_type: VehicleType):
     self.spot_id = spot_id
     self.spot_type = spot_type
@@ -37,16 +40,27 @@ class ParkingSpot:
 
 
 # Parking level which contains list of parking spots
+# Free spots are also indexed by vehicle type so lookups don't scan the whole level
 class ParkingLevel:
   def __init__(self, level_number: int, spots: List[ParkingSpot]):
     self.level_number = level_number
     self.spots = spots
+    # Insertion-ordered set of free spots per type, keyed by the spot object itself
+    self.available: Dict[VehicleType, Dict[ParkingSpot, None]] = {vehicle_type: {} for vehicle_type in VehicleType}
+    for spot in spots:
+      if not spot.occupied:
+        self.available[spot.spot_type][spot] = None
   
   def getAvailableSpot(self, vehicle_type: VehicleType):
-    for spot in self.spots:
-      if spot.isAvailable(vehicle_type):
-        return spot
-    return None
+    return next(iter(self.available[vehicle_type]), None)
+
+  def occupySpot(self, spot: ParkingSpot):
+    spot.occupy()
+    self.available[spot.spot_type].pop(spot, None)
+
+  def vacateSpot(self, spot: ParkingSpot):
+    spot.vacate()
+    self.available[spot.spot_type][spot] = None
   
 
 # Parking lot which will contain list of levels
@@ -66,15 +80,18 @@ class ParkingLot:
 
 # Ticket class which will contain just vehicle, parking and time details
 class Ticket:
+  __slots__ = ("vehicle", "level", "spot", "in_time", "out_time")
+
   def __init__(self, vehicle: Vehicle, level: ParkingLevel, spot: ParkingSpot):
     self.vehicle = vehicle
     self.level = level
     self.spot = spot
-    self.in_time = datetime.now()
+    # Monotonic seconds: unaffected by clock changes and cheap to subtract
+    self.in_time = time.monotonic()
     self.out_time = None
   
   def closeTicket(self):
-    self.out_time = datetime.now()
+    self.out_time = time.monotonic()
 
 
 
@@ -93,25 +110,24 @@ class ParkingSpotManager:
   def findAvailableSpot(self, vehicle_type: VehicleType):
     return self.parking_lot.getAvailableSpot(vehicle_type)
   
-  def occupySpot(self, spot: ParkingSpot):
-    spot.occupy()
+  def occupySpot(self, level: ParkingLevel, spot: ParkingSpot):
+    level.occupySpot(spot)
   
-  def vacateSpot(self, spot: ParkingSpot):
-    spot.vacate()
+  def vacateSpot(self, level: ParkingLevel, spot: ParkingSpot):
+    level.vacateSpot(spot)
 
 
 # Ticket manager class: manages tickets
+# The active ticket is stored on the vehicle itself, so no lookup by license plate is needed
 class TicketManager:
-  def __init__(self):
-    self.tickets = {}
-  
   def issueTicket(self, vehicle: Vehicle, level: ParkingLevel, spot: ParkingSpot):
     ticket = TicketFactory.createTicket(vehicle, level, spot)
-    self.tickets[vehicle.license_plate] = ticket
+    vehicle.active_ticket = ticket
     return ticket
 
   def closeTicket(self, vehicle: Vehicle):
-    ticket: Ticket = self.tickets.pop(vehicle.license_plate, None)
+    ticket: Ticket = vehicle.active_ticket
+    vehicle.active_ticket = None
     if ticket:
       ticket.closeTicket()
     return ticket
@@ -119,9 +135,9 @@ class TicketManager:
 
 
 # Pricing strategies
-class PricingStrategy(ABC):
+class PricingStrategy:
   def calculatePrice(self, ticket: Ticket):
-    pass
+    raise NotImplementedError
 
 class FlatPricingStrategy(PricingStrategy):
   def calculatePrice(self, ticket: Ticket):
@@ -129,8 +145,9 @@ class FlatPricingStrategy(PricingStrategy):
 
 class HourlyRatePricing(PricingStrategy):
   def calculatePrice(self, ticket: Ticket):
-    duration = max(1, int((ticket.out_time - ticket.in_time).total_seconds() // 3600))
-    return duration * 20
+    # Every started hour is billed
+    hours = max(1, math.ceil((ticket.out_time - ticket.in_time) / 3600))
+    return hours * 20
 
 
 class PriceCalculator:
@@ -142,9 +159,9 @@ class PriceCalculator:
 
 
 # Payment Strategy
-class PaymentStrategy(ABC):
+class PaymentStrategy:
   def pay(self, amount: float):
-    pass
+    raise NotImplementedError
 
 class CardPayment(PaymentStrategy):
   def pay(self, amount: float):
@@ -185,7 +202,7 @@ class ParkingLotService:
       print("No spot available")
     
     level, spot = result
-    self.parking_spot_manager.occupySpot(spot)
+    self.parking_spot_manager.occupySpot(level, spot)
     ticket = self.ticket_manager.issueTicket(vehicle, level, spot)
 
     print(f"Spot {spot.spot_id} - Level {level.level_number} assigned to Vehicle {vehicle.license_plate}")
@@ -197,7 +214,7 @@ class ParkingLotService:
       print("No active ticket found")
       return
     
-    self.parking_spot_manager.vacateSpot(ticket.spot)
+    self.parking_spot_manager.vacateSpot(ticket.level, ticket.spot)
     payment_manager.performPayment(ticket)
 
 
@@ -218,7 +235,6 @@ if __name__ == "__main__":
   parking_lot_service.parkVehicle(vehicle1)
   parking_lot_service.parkVehicle(vehicle2)
 
-  import time
   time.sleep(5)
 
   payment_manager = PaymentManager(CardPayment(), HourlyRatePricing())
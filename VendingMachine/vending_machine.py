@@ -1,4 +1,3 @@
-from abc import ABC, abstractmethod
 from enum import Enum
 from typing import List
 
@@ -9,12 +8,26 @@ class Coin(Enum):
   HALF = 0.5
   QUARTER = 0.25
 
+# Coin values looked up once instead of going through the enum per coin
+COIN_VALUES = {coin: coin.value for coin in Coin}
+
+# Coins sorted largest first, computed once at import
+COIN_DESC = tuple(sorted(Coin, key = lambda c: -c.value))
+
+# Coins with their value in integer cents, largest first
+COIN_CENTS = tuple((coin, int(round(coin.value * 100))) for coin in COIN_DESC)
+
 class PaymentType(Enum):
   COIN = "COIN"
   CARD = "CARD"
 
+# Module-level aliases for the payment types checked on every insertion
+PAY_COIN, PAY_CARD = PaymentType.COIN, PaymentType.CARD
+
 # Models
 class Product:
+  __slots__ = ("code", "name", "price", "quantity")
+
   def __init__(self, code: str, name: str, price: float, quantity: int):
     self.code = code
     self.name = name
@@ -30,6 +43,8 @@ class Product:
     self.quantity -= 1
 
 class TransactionSession:
+  __slots__ = ("product", "payment_type", "amount_paid")
+
   def __init__(self, product: Product, payment_type: PaymentType):
     self.product = product
     self.payment_type = payment_type
@@ -46,14 +61,14 @@ class TransactionSession:
 
 
 # Payment handlers
-class PaymentHandler(ABC):
-  @abstractmethod
+class PaymentHandler:
   def pay(self):
-    pass
+    raise NotImplementedError
 
+# Takes the whole batch of inserted coins, so the session and state are updated once per insertion
 class CoinPaymentHandler(PaymentHandler):
   def pay(self, session: TransactionSession, coins: List[Coin]):
-    total = sum(coin.value for coin in coins)
+    total = sum(COIN_VALUES[coin] for coin in coins)
     session.addPayment(total)
     return total
 
@@ -63,50 +78,48 @@ class CardPaymentHandler(PaymentHandler):
     return session.product.price
   
 
+# Greedy change in integer cents, avoiding float rounding errors
 class ChangeCalculator:
   @staticmethod
   def calculateChange(change_amount: float):
+    cents = int(round(change_amount * 100))
+    if cents <= 0:
+      return []
     result = []
-    for coin in sorted(Coin, key = lambda c: -c.value):
-      while change_amount >= coin.value:
-        result.append(coin)
-        change_amount = round(change_amount - coin.value, 2)
+    for coin, value in COIN_CENTS:
+      count, cents = divmod(cents, value)
+      result.extend([coin] * count)
     return result
   
 
 # Vending state interface
-class VendingState(ABC):
-  @abstractmethod
+class VendingState:
   def selectProduct(self, machine, product_code, payment_type):
-    pass
+    raise NotImplementedError
   
-  @abstractmethod
   def insertCoins(self, machine, coins):
-    pass
+    raise NotImplementedError
   
-  @abstractmethod
   def insertCard(self, machine, card_number):
-    pass
+    raise NotImplementedError
   
-  @abstractmethod
   def cancel(self, machine):
-    pass
+    raise NotImplementedError
   
-  @abstractmethod
   def dispense(self, machine):
-    pass
+    raise NotImplementedError
 
 
 # Concrete states
 class IdleState(VendingState):
   def selectProduct(self, machine, product_code, payment_type):
-    if product_code not in machine.inventory:
+    product = machine.inventory.get(product_code)
+    if product is None:
       raise Exception("Invalid product code")
-    product = machine.inventory[product_code]
     if not product.isAvailable():
       raise Exception("Product out of stock")
     machine.session = TransactionSession(product, payment_type)
-    machine.state = HasProductState()
+    machine.state = HAS_PRODUCT_STATE
     return product
 
   def insertCoins(self, machine, coins):
@@ -127,22 +140,22 @@ class HasProductState(VendingState):
     raise Exception("Product already selected")
   
   def insertCoins(self, machine, coins):
-    if machine.session.payment_type != PaymentType.COIN:
+    if machine.session.payment_type != PAY_COIN:
       raise Exception("Card payment selected")
     CoinPaymentHandler().pay(machine.session, coins)
     if machine.session.isFullyPaid():
-      machine.state = PaidState()
+      machine.state = PAID_STATE
   
   def insertCard(self, machine, card_number):
-    if machine.session.payment_type != PaymentType.CARD:
+    if machine.session.payment_type != PAY_CARD:
       raise Exception("Coin payment selected")
     CardPaymentHandler().pay(machine.session, card_number)
-    machine.state = PaidState()
+    machine.state = PAID_STATE
   
   def cancel(self, machine):
     refund = machine.session.amount_paid
     machine.session = None
-    machine.state = IdleState()
+    machine.state = IDLE_STATE
     return refund
   
   def dispense(self, machine):
@@ -163,7 +176,7 @@ class PaidState(VendingState):
   def cancel(self, machine):
     refund = machine.session.amount_paid
     machine.session = None
-    machine.state = IdleState()
+    machine.state = IDLE_STATE
     return refund
   
   def dispense(self, machine):
@@ -171,10 +184,16 @@ class PaidState(VendingState):
     change_amount = machine.session.getChangeAmount()
     change = ChangeCalculator.calculateChange(change_amount)
     machine.session = None
-    machine.state = IdleState()
+    machine.state = IDLE_STATE
     return change
 
 
+# States hold no data of their own, so one shared instance of each is enough
+IDLE_STATE = IdleState()
+HAS_PRODUCT_STATE = HasProductState()
+PAID_STATE = PaidState()
+
+
 
 # Vending machine
 class VendingMachine:
@@ -186,7 +205,7 @@ class VendingMachine:
       "A4": Product("A4", "Candy Bar", 1.25, 7),
     }
     self.session = None
-    self.state: VendingState = IdleState()
+    self.state: VendingState = IDLE_STATE
   
   def selectProduct(self, code, payment_method):
     return self.state.selectProduct(self, code, payment_method)